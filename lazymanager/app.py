@@ -1,9 +1,13 @@
 import asyncio
+import bisect
 import logging
+import operator
 import os
 import shutil
 import subprocess
+import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -14,8 +18,8 @@ from watchdog.events import FileSystemEventHandler
 
 from .config import (load_access_history, load_config, load_metadata_cache,
                      save_access_history, save_metadata_cache)
-from .git_utils import (get_git_ahead_behind, get_git_branch, get_git_status,
-                        get_last_commit_date)
+from .git_utils import (get_git_snapshot, get_last_commit_date,
+                        get_state_signature, resolve_head_sha)
 from .models import Repository
 from .repository import find_git_repos
 from .widgets import ErrorConsole, RepositoryPane
@@ -24,28 +28,30 @@ logger = logging.getLogger('lazymanager')
 
 
 class GitChangeHandler(FileSystemEventHandler):
-  def __init__(self, app, repo):
+  def __init__(self, app, repo_by_gitdir):
     self.app = app
-    self.repo = repo
-    self.debounce_timer = None
+    self.repo_by_gitdir = repo_by_gitdir
+    self.gitdir_prefixes = sorted(repo_by_gitdir)
+
+  def _resolve_repo(self, src_path):
+    index = bisect.bisect_right(self.gitdir_prefixes, src_path)
+    if index:
+      prefix = self.gitdir_prefixes[index - 1]
+      if src_path == prefix or src_path.startswith(prefix + os.sep):
+        return self.repo_by_gitdir[prefix]
+    return None
 
   def on_any_event(self, event):
     if event.is_directory:
       return
 
-    path = Path(event.src_path)
-    if path.name in ('index.lock', 'HEAD.lock', '.git.lock'):
+    src_path = event.src_path
+    if os.path.basename(src_path) in ('index.lock', 'HEAD.lock', '.git.lock'):
       return
 
-    if self.debounce_timer:
-      self.debounce_timer.cancel()
-
-    self.debounce_timer = threading.Timer(1.0, self._flag_needs_refresh)
-    self.debounce_timer.start()
-
-  def _flag_needs_refresh(self):
-    self.repo.needs_refresh = True
-    self.app.call_from_thread(self.app.refresh_list)
+    repo = self._resolve_repo(src_path)
+    if repo:
+      self.app.call_from_thread(self.app.mark_repo_dirty, repo)
 
 
 class LazyManagerApp(App):
@@ -75,36 +81,99 @@ class LazyManagerApp(App):
     self.metadata_cache = {}
     self.access_history = {}
     self.observer = None
+    self._git_semaphore = asyncio.Semaphore(self._git_concurrency())
+    self._io_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='git-io')
+    self._cache_lock = threading.Lock()
+    self._cache_dirty = False
+    self._row_order = None
+    self._last_rows = {}
+    self._column_keys = []
+    self._sorted_cache = {}
+    self._refresh_pending = False
+    self._lazygit_cmd = None
+    self._inflight_refresh = set()
+    self._ui_thread_id = None
+
+  @staticmethod
+  def _git_concurrency():
+    try:
+      value = int(os.environ.get('LAZYMANAGER_GIT_CONCURRENCY', 0))
+      if value > 0:
+        return value
+    except ValueError:
+      logger.warning('Invalid LAZYMANAGER_GIT_CONCURRENCY value, using default')
+    return (os.cpu_count() or 4) * 4
+
+  def invalidate_sorted_cache(self):
+    self._sorted_cache.clear()
 
   def get_sorted_repos(self):
+    cached = self._sorted_cache.get(self.sort_method)
+    if cached is not None:
+      return cached
+
     if self.sort_method == 'name':
-      return sorted(self.repos, key=lambda r: r.sort_key_name)
+      result = sorted(self.repos, key=operator.attrgetter('sort_name'))
     elif self.sort_method == 'accessed':
-      return sorted(self.repos, key=lambda r: r.sort_key_accessed, reverse=True)
+      result = sorted(self.repos, key=operator.attrgetter('sort_ts_accessed'), reverse=True)
     elif self.sort_method == 'commit':
-      return sorted(self.repos, key=lambda r: r.sort_key_commit, reverse=True)
-    return self.repos
+      result = sorted(self.repos, key=operator.attrgetter('sort_ts_commit'), reverse=True)
+    else:
+      result = self.repos
+
+    self._sorted_cache[self.sort_method] = result
+    return result
+
+  def mark_repo_dirty(self, repo: Repository) -> None:
+    if not repo.needs_refresh:
+      repo.needs_refresh = True
+      repo.invalidate_row()
+    self._schedule_refresh()
+
+  def _schedule_refresh(self) -> None:
+    if self._refresh_pending:
+      return
+    self._refresh_pending = True
+    self.set_timer(0.1, self._do_refresh)
+
+  def _do_refresh(self) -> None:
+    self._refresh_pending = False
+    self.refresh_list()
 
   def refresh_list(self):
     table = self.query_one(DataTable)
-    cursor_row = table.cursor_row
-    table.clear()
-
     sorted_repos = self.get_sorted_repos()
-    if sorted_repos:
-      for repo in sorted_repos:
-        last_accessed = repo.last_accessed.strftime('%Y-%m-%d %H:%M') if repo.last_accessed else 'Never'
-        last_commit = repo.last_commit.strftime('%Y-%m-%d') if repo.last_commit else ('!' if repo.has_error else 'N/A')
-        branch = repo.branch if repo.branch else ('!' if repo.has_error else '...')
-        status = repo.status if repo.status else ('!' if repo.has_error else '...')
-        ahead_behind = repo.ahead_behind_display if not repo.has_error else '!'
-        refresh_indicator = '⟳' if repo.needs_refresh else ''
-        table.add_row(repo.name, branch, status, ahead_behind, last_accessed, last_commit, refresh_indicator)
-
-      if cursor_row < len(sorted_repos):
-        table.move_cursor(row=cursor_row)
+
+    if not sorted_repos:
+      with self.batch_update():
+        table.clear()
+        self._row_order = None
+        self._last_rows.clear()
+        table.add_row(f'No git repositories found in {self.base_path}', '', '', '', '', '', '')
+      return
+
+    order = [repo.path_str for repo in sorted_repos]
+    if order == self._row_order:
+      with self.batch_update():
+        for row_key, repo in zip(order, sorted_repos):
+          row = repo.display_row()
+          if self._last_rows.get(row_key) == row:
+            continue
+          for column_key, value in zip(self._column_keys, row):
+            table.update_cell(row_key, column_key, value, update_width=True)
+          self._last_rows[row_key] = row
     else:
-      table.add_row(f'No git repositories found in {self.base_path}', '', '', '', '', '', '')
+      cursor_row = table.cursor_row
+      with self.batch_update():
+        table.clear()
+        self._last_rows.clear()
+        for row_key, repo in zip(order, sorted_repos):
+          row = repo.display_row()
+          table.add_row(*row, key=row_key)
+          self._last_rows[row_key] = row
+        self._row_order = order
+        if cursor_row < len(sorted_repos):
+          table.move_cursor(row=cursor_row)
 
   def compose(self) -> ComposeResult:
     yield Header()
@@ -115,21 +184,26 @@ class LazyManagerApp(App):
   def on_mount(self) -> None:
     try:
       logger.info('App mounted, initializing UI')
+      self._ui_thread_id = threading.get_ident()
+      asyncio.get_running_loop().set_default_executor(self._io_pool)
       self.title = 'LazyManager'
       self.sub_title = 'Select a repository (sorted by last accessed)'
 
       table = self.query_one(DataTable)
-      table.add_columns('Repository', 'Branch', 'Status', '↑↓', 'Last Accessed', 'Last Commit', '')
+      self._column_keys = table.add_columns('Repository', 'Branch', 'Status', '↑↓', 'Last Accessed', 'Last Commit', '')
 
       self.metadata_cache = load_metadata_cache()
       self.access_history = load_access_history()
+      self._lazygit_cmd = shutil.which('lazygit') or shutil.which('lazygit.exe')
 
       self.repos = find_git_repos(self.base_path, self.access_history, self.metadata_cache)
       logger.info(f'Found {len(self.repos)} repositories')
+      self.invalidate_sorted_cache()
       self.refresh_list()
 
       self.load_metadata_async()
       self.start_watching()
+      self.set_interval(2.0, self._flush_metadata_cache)
     except Exception as e:
       logger.exception('Error during mount')
 
@@ -149,9 +223,24 @@ class LazyManagerApp(App):
     self.refresh_list()
 
   def action_refresh(self) -> None:
-    repos_to_refresh = [repo for repo in self.repos if repo.needs_refresh]
+    repos_to_refresh = [
+      repo for repo in self.repos
+      if repo.needs_refresh and repo.path_str not in self._inflight_refresh
+    ]
     if repos_to_refresh:
-      self.run_worker(self.refresh_repos_metadata(repos_to_refresh), exclusive=False)
+      self._start_refresh(repos_to_refresh)
+
+  def _start_refresh(self, repos) -> None:
+    for repo in repos:
+      self._inflight_refresh.add(repo.path_str)
+    self.run_worker(self._refresh_guarded(repos), exclusive=False)
+
+  async def _refresh_guarded(self, repos) -> None:
+    try:
+      await self.refresh_repos_metadata(repos)
+    finally:
+      for repo in repos:
+        self._inflight_refresh.discard(repo.path_str)
 
   def action_toggle_errors(self, shift: bool = False) -> None:
     logger.debug(f'Toggling error console (shift={shift})')
@@ -184,6 +273,9 @@ class LazyManagerApp(App):
     text_area.focus()
 
   def log_error(self, message: str) -> None:
+    if self._ui_thread_id is not None and threading.get_ident() != self._ui_thread_id:
+      self.call_from_thread(self.log_error, message)
+      return
     try:
       error_console = self.query_one(ErrorConsole)
       error_console.log_error(message)
@@ -193,91 +285,124 @@ class LazyManagerApp(App):
   def fetch_repo_metadata(self, repo: Repository) -> Repository:
     repo.has_error = False
 
-    commit_result = get_last_commit_date(repo.path, self.log_error)
-    repo.last_commit = commit_result.value
-    repo.has_error = repo.has_error or commit_result.has_error
-
-    branch_result = get_git_branch(repo.path, self.log_error)
-    repo.branch = branch_result.value
-    repo.has_error = repo.has_error or branch_result.has_error
-
-    status_result = get_git_status(repo.path, self.log_error)
-    repo.status = status_result.value
-    repo.has_error = repo.has_error or status_result.has_error
-
-    ahead_behind_result = get_git_ahead_behind(repo.path, self.log_error)
-    if ahead_behind_result.value:
-      repo.ahead = ahead_behind_result.value.ahead
-      repo.behind = ahead_behind_result.value.behind
-      repo.has_upstream = ahead_behind_result.value.has_upstream
+    cached = self.metadata_cache.get(repo.path_str, {})
+    mtime_sig = get_state_signature(repo.path)
+    if mtime_sig and mtime_sig == cached.get('mtime_sig') and cached.get('branch'):
+      repo.last_commit = cached.get('last_commit')
+      repo.branch = cached.get('branch')
+      repo.status = cached.get('status')
+      repo.ahead = cached.get('ahead')
+      repo.behind = cached.get('behind')
+      repo.has_upstream = cached.get('has_upstream')
+      repo.head_sha = cached.get('head_sha')
+      repo.mtime_sig = mtime_sig
+      repo.refresh_sort_keys()
+      repo.invalidate_row()
+      return repo
+
+    head_sha = resolve_head_sha(repo.path)
+    if head_sha and head_sha == cached.get('head_sha') and cached.get('last_commit'):
+      repo.last_commit = cached['last_commit']
     else:
+      commit_result = get_last_commit_date(repo.path, self.log_error)
+      repo.last_commit = commit_result.value
+      repo.has_error = repo.has_error or commit_result.has_error
+    repo.head_sha = head_sha
+
+    snapshot_result = get_git_snapshot(repo.path, self.log_error)
+    if snapshot_result.value:
+      snapshot = snapshot_result.value
+      repo.branch = snapshot.branch
+      repo.status = snapshot.status
+      repo.ahead = snapshot.ahead
+      repo.behind = snapshot.behind
+      repo.has_upstream = snapshot.has_upstream
+    else:
+      repo.branch = None
+      repo.status = None
       repo.ahead = None
       repo.behind = None
       repo.has_upstream = None
-    repo.has_error = repo.has_error or ahead_behind_result.has_error
+    repo.has_error = repo.has_error or snapshot_result.has_error
+    repo.mtime_sig = mtime_sig if not repo.has_error else None
+    repo.refresh_sort_keys()
+    repo.invalidate_row()
 
     return repo
 
   def save_repo_to_cache(self, repo: Repository) -> None:
-    self.metadata_cache[str(repo.path)] = {
-      'branch': repo.branch,
-      'status': repo.status,
-      'ahead': repo.ahead,
-      'behind': repo.behind,
-      'has_upstream': repo.has_upstream,
-      'last_commit': repo.last_commit
-    }
+    with self._cache_lock:
+      self.metadata_cache[repo.path_str] = {
+        'branch': repo.branch,
+        'status': repo.status,
+        'ahead': repo.ahead,
+        'behind': repo.behind,
+        'has_upstream': repo.has_upstream,
+        'last_commit': repo.last_commit,
+        'head_sha': repo.head_sha,
+        'mtime_sig': repo.mtime_sig
+      }
+      self._cache_dirty = True
+
+  def _flush_metadata_cache(self) -> None:
+    with self._cache_lock:
+      if not self._cache_dirty:
+        return
+      snapshot = dict(self.metadata_cache)
+      self._cache_dirty = False
+    try:
+      save_metadata_cache(snapshot)
+    except Exception as e:
+      logger.error(f'Failed to flush metadata cache: {str(e)}')
 
   def load_metadata_async(self) -> None:
     self.run_worker(self.load_all_metadata(), exclusive=False)
 
+  async def fetch_repo_metadata_bounded(self, repo: Repository) -> Repository:
+    async with self._git_semaphore:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(self._io_pool, self.fetch_repo_metadata, repo)
+
   async def load_all_metadata(self) -> None:
     try:
-      tasks = [asyncio.to_thread(self.fetch_repo_metadata, repo) for repo in self.repos]
+      tasks = [self.fetch_repo_metadata_bounded(repo) for repo in self.repos]
       await asyncio.gather(*tasks, return_exceptions=True)
 
       for repo in self.repos:
         self.save_repo_to_cache(repo)
 
-      save_metadata_cache(self.metadata_cache)
-      self.refresh_list()
+      self.invalidate_sorted_cache()
+      self._schedule_refresh()
     except Exception as e:
       logger.exception('Error in load_all_metadata')
 
   async def refresh_repos_metadata(self, repos) -> None:
     try:
-      tasks = [asyncio.to_thread(self.fetch_repo_metadata, repo) for repo in repos]
+      tasks = [self.fetch_repo_metadata_bounded(repo) for repo in repos]
       await asyncio.gather(*tasks, return_exceptions=True)
 
       for repo in repos:
         repo.needs_refresh = False
+        repo.invalidate_row()
         self.save_repo_to_cache(repo)
 
-      save_metadata_cache(self.metadata_cache)
-      self.refresh_list()
+      self.invalidate_sorted_cache()
+      self._schedule_refresh()
     except Exception as e:
       logger.exception('Error in refresh_repos_metadata')
 
   def start_watching(self):
     self.observer = Observer()
 
-    for repo in self.repos:
-      git_dir = repo.path / '.git'
-      if not git_dir.exists():
-        continue
-
-      handler = GitChangeHandler(self, repo)
-
-      watch_paths = [
-        git_dir / 'HEAD',
-        git_dir / 'index',
-        git_dir / 'FETCH_HEAD',
-        git_dir / 'refs' / 'heads'
-      ]
+    repo_by_gitdir = {os.path.join(repo.path_str, '.git'): repo for repo in self.repos}
+    handler = GitChangeHandler(self, repo_by_gitdir)
 
-      for watch_path in watch_paths:
-        if watch_path.exists():
-          self.observer.schedule(handler, str(watch_path), recursive=(watch_path.name == 'heads'))
+    for git_dir in repo_by_gitdir:
+      for watch_path, recursive in ((git_dir, False), (os.path.join(git_dir, 'refs', 'heads'), True)):
+        try:
+          self.observer.schedule(handler, watch_path, recursive=recursive)
+        except OSError as e:
+          logger.warning(f'Failed to watch {watch_path}: {str(e)}')
 
     self.observer.start()
     logger.info(f'Started watching {len(self.repos)} repositories')
@@ -289,8 +414,8 @@ class LazyManagerApp(App):
     sorted_repos = self.get_sorted_repos()
     if event.cursor_row < len(sorted_repos):
       repo = sorted_repos[event.cursor_row]
-      if repo.needs_refresh:
-        self.run_worker(self.refresh_repos_metadata([repo]), exclusive=False)
+      if repo.needs_refresh and repo.path_str not in self._inflight_refresh:
+        self._start_refresh([repo])
 
   def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
     sorted_repos = self.get_sorted_repos()
@@ -299,12 +424,15 @@ class LazyManagerApp(App):
       self.run_lazygit(repo)
 
   def run_lazygit(self, repo: Repository) -> None:
-    self.access_history[str(repo.path)] = datetime.now()
-    save_access_history(self.access_history)
+    self.access_history[repo.path_str] = datetime.now()
+    self._io_pool.submit(save_access_history, dict(self.access_history))
 
-    repo.last_accessed = self.access_history[str(repo.path)]
+    repo.last_accessed = self.access_history[repo.path_str]
+    repo.refresh_sort_keys()
+    repo.invalidate_row()
+    self.invalidate_sorted_cache()
 
-    lazygit_cmd = shutil.which('lazygit') or shutil.which('lazygit.exe')
+    lazygit_cmd = self._lazygit_cmd
     if not lazygit_cmd:
       with self.suspend():
         print('Error: lazygit not found. Please install lazygit first.')
@@ -316,7 +444,8 @@ class LazyManagerApp(App):
       except Exception as e:
         print(f'Error running lazygit: {e}')
 
-    os.system('echo \033]0;%s\007' % 'lazymanager')
+    sys.stdout.write('\033]0;lazymanager\007')
+    sys.stdout.flush()
     self.refresh_list()
 
   def on_unmount(self) -> None:
@@ -324,3 +453,5 @@ class LazyManagerApp(App):
       self.observer.stop()
       self.observer.join()
       logger.info('Stopped file system watcher')
+    self._flush_metadata_cache()
+    self._io_pool.shutdown(wait=False, cancel_futures=True)
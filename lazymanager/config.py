@@ -1,20 +1,31 @@
+import functools
 import json
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
 logger = logging.getLogger('lazymanager')
 
 
-def atomic_write_json(path, data):
+def atomic_write_json(path, data, durable=False):
   path = Path(path)
   temp_path = path.with_suffix('.tmp')
   try:
-    with open(temp_path, 'w') as f:
-      json.dump(data, f, indent=2)
-      f.flush()
-      os.fsync(f.fileno())
+    if orjson is not None:
+      payload = orjson.dumps(data)
+    else:
+      payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False, check_circular=False).encode('utf-8')
+    with open(temp_path, 'wb') as f:
+      f.write(payload)
+      if durable:
+        f.flush()
+        os.fsync(f.fileno())
     os.replace(temp_path, path)
   except Exception as e:
     if temp_path.exists():
@@ -22,6 +33,15 @@ def atomic_write_json(path, data):
     raise
 
 
+def _load_json(path):
+  with open(path, 'rb') as f:
+    payload = f.read()
+  if orjson is not None:
+    return orjson.loads(payload)
+  return json.loads(payload)
+
+
+@functools.cache
 def get_config_dir():
   config_dir = Path.home() / '.config' / 'lazymanager'
   config_dir.mkdir(parents=True, exist_ok=True)
@@ -50,9 +70,8 @@ def load_config():
     return default_config
 
   try:
-    with open(config_path, 'r') as f:
-      data = json.load(f)
-      return {**default_config, **data}
+    data = _load_json(config_path)
+    return {**default_config, **data}
   except FileNotFoundError:
     return default_config
   except json.JSONDecodeError as e:
@@ -68,7 +87,7 @@ def load_config():
 
 def save_config(config):
   config_path = get_config_path()
-  atomic_write_json(config_path, config)
+  atomic_write_json(config_path, config, durable=True)
 
 
 def load_access_history():
@@ -77,9 +96,8 @@ def load_access_history():
     return {}
 
   try:
-    with open(config_path, 'r') as f:
-      data = json.load(f)
-      return {k: datetime.fromisoformat(v) for k, v in data.items()}
+    data = _load_json(config_path)
+    return {k: datetime.fromisoformat(v) for k, v in data.items()}
   except FileNotFoundError:
     return {}
   except json.JSONDecodeError as e:
@@ -105,19 +123,16 @@ def load_metadata_cache():
     return {}
 
   try:
-    with open(cache_path, 'r') as f:
-      data = json.load(f)
-      result = {}
-      for repo_path, metadata in data.items():
-        result[repo_path] = {
-          'branch': metadata.get('branch'),
-          'status': metadata.get('status'),
-          'ahead': metadata.get('ahead'),
-          'behind': metadata.get('behind'),
-          'has_upstream': metadata.get('has_upstream'),
-          'last_commit': datetime.fromisoformat(metadata['last_commit']) if metadata.get('last_commit') else None
-        }
-      return result
+    data = _load_json(cache_path)
+    for metadata in data.values():
+      last_commit = metadata.get('last_commit')
+      if isinstance(last_commit, (int, float)):
+        metadata['last_commit'] = datetime.fromtimestamp(last_commit, tz=timezone.utc)
+      elif last_commit:
+        metadata['last_commit'] = datetime.fromisoformat(last_commit)
+      else:
+        metadata['last_commit'] = None
+    return data
   except FileNotFoundError:
     return {}
   except json.JSONDecodeError as e:
@@ -141,6 +156,8 @@ def save_metadata_cache(cache):
       'ahead': metadata.get('ahead'),
       'behind': metadata.get('behind'),
       'has_upstream': metadata.get('has_upstream'),
-      'last_commit': metadata['last_commit'].isoformat() if metadata.get('last_commit') else None
+      'last_commit': metadata['last_commit'].timestamp() if metadata.get('last_commit') else None,
+      'head_sha': metadata.get('head_sha'),
+      'mtime_sig': metadata.get('mtime_sig')
     }
   atomic_write_json(cache_path, data)
@@ -1,161 +1,186 @@
+import functools
 import logging
+import os
+import shutil
 import subprocess
-from datetime import datetime
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from .models import AheadBehindInfo, GitResult
+from .models import GitResult, RepoSnapshot
 
 logger = logging.getLogger('lazymanager')
 
+_POPEN_KW = {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == 'win32' else {}
+_GIT = shutil.which('git') or 'git'
+_ARGV_LOG = ('log', '-1', '--format=%cI')
+_ARGV_STATUS = ('status', '--porcelain=v2', '--branch')
+_ERR_RESULT = GitResult(value=None, has_error=True)
 
-def get_last_commit_date(repo_path, error_callback=None) -> GitResult[datetime]:
+
+@functools.lru_cache(maxsize=1024)
+def _parse_iso(s: str) -> datetime:
+  return datetime.fromisoformat(s)
+
+
+def _read_loose_commit_date(repo_path, sha) -> datetime | None:
+  obj_path = os.path.join(str(repo_path), '.git', 'objects', sha[:2], sha[2:])
   try:
-    result = subprocess.run(
-      ['git', 'log', '-1', '--format=%cI'],
-      cwd=str(repo_path),
-      capture_output=True,
-      text=True,
-      timeout=2
-    )
-    if result.returncode == 0 and result.stdout.strip():
-      return GitResult(value=datetime.fromisoformat(result.stdout.strip()), has_error=False)
-    elif result.returncode != 0:
-      if error_callback:
-        error_callback(f'git log failed in {Path(repo_path).name}: {result.stderr.strip()}')
-      return GitResult(value=None, has_error=True)
-  except subprocess.TimeoutExpired:
-    logger.warning(f'git log timeout in {Path(repo_path).name}')
-    return GitResult(value=None, has_error=True)
-  except Exception as e:
-    logger.error(f'git log exception in {Path(repo_path).name}: {str(e)}')
-    return GitResult(value=None, has_error=True)
-  return GitResult(value=None, has_error=False)
+    with open(obj_path, 'rb') as f:
+      raw = zlib.decompress(f.read())
+  except (OSError, zlib.error):
+    return None
 
+  if not raw.startswith(b'commit '):
+    return None
 
-def get_git_branch(repo_path, error_callback=None) -> GitResult[str]:
   try:
-    result = subprocess.run(
-      ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-      cwd=str(repo_path),
-      capture_output=True,
-      text=True,
-      timeout=1
-    )
-    if result.returncode == 0 and result.stdout.strip():
-      return GitResult(value=result.stdout.strip(), has_error=False)
-    elif result.returncode != 0:
-      if error_callback:
-        error_callback(f'git rev-parse failed in {Path(repo_path).name}: {result.stderr.strip()}')
-      return GitResult(value=None, has_error=True)
-  except subprocess.TimeoutExpired:
-    logger.warning(f'git rev-parse timeout in {Path(repo_path).name}')
-    return GitResult(value=None, has_error=True)
-  except Exception as e:
-    logger.error(f'git rev-parse exception in {Path(repo_path).name}: {str(e)}')
-    return GitResult(value=None, has_error=True)
-  return GitResult(value=None, has_error=False)
+    body = raw[raw.index(b'\x00') + 1:]
+    for line in body.split(b'\n'):
+      if not line:
+        break
+      if line.startswith(b'committer '):
+        # committer Name <email> <unixtime> <+hhmm>
+        parts = line.rsplit(b' ', 2)
+        epoch = int(parts[1])
+        tz = parts[2]
+        sign = -1 if tz[:1] == b'-' else 1
+        offset = sign * (int(tz[1:3]) * 3600 + int(tz[3:5]) * 60)
+        return datetime.fromtimestamp(epoch, tz=timezone(timedelta(seconds=offset)))
+  except (ValueError, IndexError):
+    return None
+  return None
 
 
-def get_git_status(repo_path, error_callback=None) -> GitResult[str]:
+def get_last_commit_date(repo_path, error_callback=None) -> GitResult[datetime]:
+  sha = resolve_head_sha(repo_path)
+  if sha:
+    commit_date = _read_loose_commit_date(repo_path, sha)
+    if commit_date is not None:
+      return GitResult(value=commit_date, has_error=False)
+
   try:
     result = subprocess.run(
-      ['git', 'status', '--porcelain'],
-      cwd=str(repo_path),
+      [_GIT, '-C', str(repo_path), *_ARGV_LOG],
       capture_output=True,
-      text=True,
-      timeout=1
+      stdin=subprocess.DEVNULL,
+      timeout=2,
+      **_POPEN_KW
     )
-    if result.returncode == 0:
-      if not result.stdout.strip():
-        return GitResult(value='clean', has_error=False)
-      return GitResult(value='modified', has_error=False)
+    if result.returncode == 0 and result.stdout.strip():
+      return GitResult(value=_parse_iso(result.stdout.strip().decode('ascii')), has_error=False)
     elif result.returncode != 0:
       if error_callback:
-        error_callback(f'git status failed in {Path(repo_path).name}: {result.stderr.strip()}')
-      return GitResult(value=None, has_error=True)
+        error_callback(f'git log failed in {os.path.basename(str(repo_path))}: {result.stderr.decode(errors="replace").strip()}')
+      return _ERR_RESULT
   except subprocess.TimeoutExpired:
-    logger.warning(f'git status timeout in {Path(repo_path).name}')
-    return GitResult(value=None, has_error=True)
+    logger.warning('git log timeout in %s', os.path.basename(str(repo_path)))
+    return _ERR_RESULT
   except Exception as e:
-    logger.error(f'git status exception in {Path(repo_path).name}: {str(e)}')
-    return GitResult(value=None, has_error=True)
+    logger.error('git log exception in %s: %s', os.path.basename(str(repo_path)), e)
+    return _ERR_RESULT
   return GitResult(value=None, has_error=False)
 
 
-def get_git_ahead_behind(repo_path, error_callback=None) -> GitResult[AheadBehindInfo]:
+def _max_mtime_ns(root) -> int:
+  latest = 0
+  stack = [root]
+  while stack:
+    try:
+      with os.scandir(stack.pop()) as it:
+        for entry in it:
+          try:
+            st = entry.stat(follow_symlinks=False)
+          except OSError:
+            continue
+          if st.st_mtime_ns > latest:
+            latest = st.st_mtime_ns
+          if entry.is_dir(follow_symlinks=False):
+            stack.append(entry.path)
+    except OSError:
+      pass
+  return latest
+
+
+def get_state_signature(repo_path) -> list[int] | None:
+  git_dir = os.path.join(str(repo_path), '.git')
+  sig = []
+  for name in ('HEAD', 'index', 'packed-refs'):
+    try:
+      sig.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+    except OSError:
+      sig.append(0)
+  sig.append(_max_mtime_ns(os.path.join(git_dir, 'refs')))
+  if not any(sig):
+    return None
+  return sig
+
+
+def resolve_head_sha(repo_path) -> str | None:
+  git_dir = Path(repo_path) / '.git'
+  try:
+    head = (git_dir / 'HEAD').read_text().strip()
+    if not head.startswith('ref: '):
+      return head or None
+
+    ref = head.removeprefix('ref: ')
+    ref_file = git_dir / ref
+    if ref_file.exists():
+      return ref_file.read_text().strip() or None
+
+    packed = git_dir / 'packed-refs'
+    if packed.exists():
+      for line in packed.read_text().splitlines():
+        if line.startswith('#') or line.startswith('^'):
+          continue
+        sha, _, name = line.partition(' ')
+        if name == ref:
+          return sha
+    return None
+  except OSError as e:
+    logger.debug('Failed to resolve HEAD in %s: %s', os.path.basename(str(repo_path)), e)
+    return None
+
+
+def get_git_snapshot(repo_path, error_callback=None) -> GitResult[RepoSnapshot]:
   try:
-    branch_result = get_git_branch(repo_path, error_callback)
-    if branch_result.has_error or not branch_result.value:
-      return GitResult(value=AheadBehindInfo(ahead=None, behind=None, has_upstream=False), has_error=False)
-
-    branch = branch_result.value
-
-    remote_result = subprocess.run(
-      ['git', 'config', f'branch.{branch}.remote'],
-      cwd=str(repo_path),
-      capture_output=True,
-      text=True,
-      timeout=1
-    )
-    merge_result = subprocess.run(
-      ['git', 'config', f'branch.{branch}.merge'],
-      cwd=str(repo_path),
-      capture_output=True,
-      text=True,
-      timeout=1
-    )
-
-    if remote_result.returncode != 0 or merge_result.returncode != 0:
-      if error_callback:
-        error_callback(f'No upstream branch configured for {branch} in {Path(repo_path).name}')
-      return GitResult(value=AheadBehindInfo(ahead=None, behind=None, has_upstream=False), has_error=False)
-
-    remote = remote_result.stdout.strip()
-    merge = merge_result.stdout.strip()
-
-    if merge.startswith('refs/heads/'):
-      merge = merge[11:]
-
-    upstream = f'{remote}/{merge}'
-
-    verify_result = subprocess.run(
-      ['git', 'rev-parse', '--verify', upstream],
-      cwd=str(repo_path),
-      capture_output=True,
-      text=True,
-      timeout=1
-    )
-    if verify_result.returncode != 0:
-      if error_callback:
-        error_callback(f'Upstream branch {upstream} not found in {Path(repo_path).name}: {verify_result.stderr.strip()}')
-      return GitResult(value=AheadBehindInfo(ahead=None, behind=None, has_upstream=False), has_error=False)
-
     result = subprocess.run(
-      ['git', 'rev-list', '--left-right', '--count', f'HEAD...{upstream}'],
-      cwd=str(repo_path),
+      [_GIT, '-C', str(repo_path), *_ARGV_STATUS],
       capture_output=True,
-      text=True,
-      timeout=1
+      stdin=subprocess.DEVNULL,
+      timeout=2,
+      **_POPEN_KW
     )
-    if result.returncode == 0 and result.stdout.strip():
-      parts = result.stdout.strip().split()
-      if len(parts) == 2:
-        return GitResult(
-          value=AheadBehindInfo(ahead=int(parts[0]), behind=int(parts[1]), has_upstream=True),
-          has_error=False
-        )
-    elif result.returncode != 0:
-      if error_callback:
-        error_callback(f'git rev-list failed in {Path(repo_path).name}: {result.stderr.strip()}')
-      return GitResult(value=None, has_error=True)
-  except subprocess.TimeoutExpired:
-    logger.warning(f'git ahead/behind timeout in {Path(repo_path).name}')
+    if result.returncode == 0:
+      branch = None
+      ahead = None
+      behind = None
+      dirty = False
+      for line in result.stdout.splitlines():
+        if line.startswith(b'# branch.head '):
+          branch = line.removeprefix(b'# branch.head ').decode(errors='replace')
+        elif line.startswith(b'# branch.ab '):
+          parts = line.removeprefix(b'# branch.ab ').split()
+          if len(parts) == 2:
+            ahead = abs(int(parts[0]))
+            behind = abs(int(parts[1]))
+        elif not line.startswith(b'#'):
+          dirty = True
+      snapshot = RepoSnapshot(
+        branch=branch,
+        status='modified' if dirty else 'clean',
+        ahead=ahead,
+        behind=behind,
+        has_upstream=ahead is not None and behind is not None
+      )
+      return GitResult(value=snapshot, has_error=False)
     if error_callback:
-      error_callback(f'git ahead/behind timeout in {Path(repo_path).name}')
-    return GitResult(value=None, has_error=True)
+      error_callback(f'git status failed in {os.path.basename(str(repo_path))}: {result.stderr.decode(errors="replace").strip()}')
+    return _ERR_RESULT
+  except subprocess.TimeoutExpired:
+    logger.warning('git status timeout in %s', os.path.basename(str(repo_path)))
+    return _ERR_RESULT
   except Exception as e:
-    logger.error(f'git ahead/behind exception in {Path(repo_path).name}: {str(e)}')
-    if error_callback:
-      error_callback(f'git ahead/behind exception in {Path(repo_path).name}: {str(e)}')
-    return GitResult(value=None, has_error=True)
-  return GitResult(value=None, has_error=True)
+    logger.error('git status exception in %s: %s', os.path.basename(str(repo_path)), e)
+    return _ERR_RESULT
@@ -1,6 +1,6 @@
 import argparse
 import logging
-import os
+import logging.handlers
 import sys
 from pathlib import Path
 
@@ -13,11 +13,14 @@ else:
   from .config import get_config_dir
 
 log_file = get_config_dir() / 'lazymanager_debug.log'
-logging.basicConfig(
-  filename=str(log_file),
-  level=logging.DEBUG,
-  format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_file_handler = logging.FileHandler(str(log_file), delay=True)
+_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_buffer_handler = logging.handlers.MemoryHandler(
+  capacity=1024,
+  flushLevel=logging.ERROR,
+  target=_file_handler
 )
+logging.basicConfig(level=logging.DEBUG, handlers=[_buffer_handler])
 logger = logging.getLogger('lazymanager')
 
 
@@ -28,7 +31,8 @@ def main():
 
   try:
     logger.info('Starting LazyManager')
-    os.system('echo \033]0;%s\007' % 'lazymanager')
+    sys.stdout.write('\033]0;lazymanager\007')
+    sys.stdout.flush()
     app = LazyManagerApp(base_path=args.base_path)
     app.run()
   except Exception as e:
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Generic, TypeVar
@@ -6,20 +6,22 @@ from typing import Generic, TypeVar
 T = TypeVar('T')
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GitResult(Generic[T]):
   value: T | None
   has_error: bool
 
 
-@dataclass
-class AheadBehindInfo:
+@dataclass(slots=True, frozen=True)
+class RepoSnapshot:
+  branch: str | None
+  status: str | None
   ahead: int | None
   behind: int | None
   has_upstream: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class Repository:
   path: Path
   name: str
@@ -33,22 +35,37 @@ class Repository:
   needs_refresh: bool = False
   has_error: bool = False
   has_upstream: bool | None = None
+  head_sha: str | None = None
+  mtime_sig: list[int] | None = None
+  sort_name: str = ''
+  sort_ts_accessed: float = 0.0
+  sort_ts_commit: float = 0.0
+  path_str: str = field(init=False, repr=False, default='')
+  _row_cache: tuple[str, ...] | None = field(init=False, repr=False, default=None)
 
-  @property
-  def sort_key_name(self):
-    return self.name.lower()
+  def __post_init__(self):
+    self.path_str = str(self.path)
+    self._row_cache = None
+    self.refresh_sort_keys()
 
-  @property
-  def sort_key_accessed(self):
-    if self.last_accessed:
-      return self.last_accessed.timestamp()
-    return 0
+  def refresh_sort_keys(self):
+    self.sort_name = self.name.lower()
+    self.sort_ts_accessed = self.last_accessed.timestamp() if self.last_accessed else 0.0
+    self.sort_ts_commit = self.last_commit.timestamp() if self.last_commit else 0.0
 
-  @property
-  def sort_key_commit(self):
-    if self.last_commit:
-      return self.last_commit.timestamp()
-    return 0
+  def invalidate_row(self):
+    self._row_cache = None
+
+  def display_row(self) -> tuple[str, ...]:
+    if self._row_cache is None:
+      last_accessed = self.last_accessed.strftime('%Y-%m-%d %H:%M') if self.last_accessed else 'Never'
+      last_commit = self.last_commit.strftime('%Y-%m-%d') if self.last_commit else ('!' if self.has_error else 'N/A')
+      branch = self.branch if self.branch else ('!' if self.has_error else '...')
+      status = self.status if self.status else ('!' if self.has_error else '...')
+      ahead_behind = self.ahead_behind_display if not self.has_error else '!'
+      refresh_indicator = '⟳' if self.needs_refresh else ''
+      self._row_cache = (self.name, branch, status, ahead_behind, last_accessed, last_commit, refresh_indicator)
+    return self._row_cache
 
   @property
   def ahead_behind_display(self):
@@ -1,4 +1,7 @@
 import logging
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from .models import Repository
@@ -6,6 +9,13 @@ from .models import Repository
 logger = logging.getLogger('lazymanager')
 
 
+def _probe_git_dir(path):
+  try:
+    return os.stat(path)
+  except OSError as e:
+    return e
+
+
 def find_git_repos(base_path, access_history, metadata_cache):
   repos = []
   base = Path(base_path)
@@ -15,36 +25,45 @@ def find_git_repos(base_path, access_history, metadata_cache):
     return repos
 
   try:
-    for item in base.iterdir():
-      try:
-        if not item.is_dir():
-          continue
+    with os.scandir(base) as entries:
+      candidates = [entry for entry in entries if entry.is_dir(follow_symlinks=False)]
+
+    if not candidates:
+      return repos
 
-        git_dir = item / '.git'
-        if not git_dir.exists():
+    with ThreadPoolExecutor(max_workers=min(16, len(candidates))) as pool:
+      git_stats = list(pool.map(lambda e: _probe_git_dir(os.path.join(e.path, '.git')), candidates))
+
+    for entry, git_stat in zip(candidates, git_stats):
+      try:
+        if isinstance(git_stat, FileNotFoundError):
           continue
+        if isinstance(git_stat, OSError):
+          raise git_stat
 
-        if not git_dir.is_dir():
-          logger.debug(f'Skipping {item.name}: .git is not a directory (likely submodule or worktree)')
+        if not stat.S_ISDIR(git_stat.st_mode):
+          logger.debug(f'Skipping {entry.name}: .git is not a directory (likely submodule or worktree)')
           continue
 
-        cached = metadata_cache.get(str(item), {})
+        cached = metadata_cache.get(entry.path, {})
         repo = Repository(
-          path=item,
-          name=item.name,
-          last_accessed=access_history.get(str(item)),
+          path=Path(entry.path),
+          name=entry.name,
+          last_accessed=access_history.get(entry.path),
           last_commit=cached.get('last_commit'),
           branch=cached.get('branch'),
           status=cached.get('status'),
           ahead=cached.get('ahead'),
           behind=cached.get('behind'),
-          has_upstream=cached.get('has_upstream')
+          has_upstream=cached.get('has_upstream'),
+          head_sha=cached.get('head_sha'),
+          mtime_sig=cached.get('mtime_sig')
         )
         repos.append(repo)
       except PermissionError:
-        logger.warning(f'Permission denied accessing: {item}')
+        logger.warning(f'Permission denied accessing: {entry.path}')
       except Exception as e:
-        logger.error(f'Error processing {item}: {str(e)}')
+        logger.error(f'Error processing {entry.path}: {str(e)}')
   except PermissionError:
     logger.error(f'Permission denied reading directory: {base_path}')
   except Exception as e:
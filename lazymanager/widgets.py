@@ -1,4 +1,5 @@
 import logging
+from collections import deque
 from datetime import datetime
 
 from textual.app import ComposeResult
@@ -49,6 +50,10 @@ class ErrorConsole(Container):
   }
   '''
 
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self._lines = deque(maxlen=5000)
+
   def compose(self) -> ComposeResult:
     yield Static('[2] Error Console')
     text_area = TextArea(read_only=True)
@@ -59,26 +64,20 @@ class ErrorConsole(Container):
     try:
       text_area = self.query_one(TextArea)
       timestamp = datetime.now().strftime('%H:%M:%S')
-      current_text = text_area.text
       new_line = f'{timestamp} {message}\n'
 
-      cursor_location = text_area.cursor_location
-      scroll_y = text_area.scroll_offset.y
-
-      text_area.load_text(current_text + new_line)
-
-      text_area.move_cursor(cursor_location)
-      text_area.scroll_to(y=scroll_y, animate=False)
+      self._lines.append(new_line)
+      text_area.insert(new_line, location=text_area.document.end, maintain_selection_offset=True)
     except Exception as e:
       logger.error(f'Failed to update error console: {str(e)}')
 
   def clear_errors(self) -> None:
+    self._lines.clear()
     text_area = self.query_one(TextArea)
     text_area.load_text('')
 
   def get_error_count(self) -> int:
-    text_area = self.query_one(TextArea)
-    return len(text_area.text.splitlines())
+    return len(self._lines)
 
 
 class RepositoryPane(Vertical):